@@ -1,16 +1,31 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Path
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.status import HTTP_201_CREATED
 from urllib.parse import unquote
+from collections import OrderedDict
+import hashlib
 import re
 
+import numpy as np
+
 from schemas import TableListResponse, TableDetailsResponse, RowSumResponse
 from utils import process_excel_file
 
-app = FastAPI(title="Excel Processor API")
+app = FastAPI(title="Excel Processor API", default_response_class=ORJSONResponse)
 
 db = {}
 
+# Memoized name lookups, valid until the next upload replaces db
+_name_cache = {}
+
+# Case-insensitive table-name index, rebuilt whenever db is replaced
+_lower_index = {}
+_lower_pairs = []  # (lowered key, original key), in table order
+
+# Processed workbooks keyed by content digest, most recently used last
+_file_cache = OrderedDict()
+_FILE_CACHE_SIZE = 8
+
 def clean_parameter(param: str) -> str:
     """Clean and decode URL parameters to handle special characters"""
     try:
@@ -23,57 +38,70 @@ def clean_parameter(param: str) -> str:
     return param.strip()
 
 def find_table_name(requested_name: str) -> str:
+    if requested_name in _name_cache:
+        return _name_cache[requested_name]
+
     cleaned_name = clean_parameter(requested_name)
-    
+    resolved = resolve_table_name(cleaned_name)
+    if resolved is None:
+        # No match found, raise error with suggestions
+        available_tables = list(db.keys())
+        raise HTTPException(404, f"Table '{cleaned_name}' not found. Available tables: {available_tables}")
+
+    _name_cache[requested_name] = resolved
+    return resolved
+
+def resolve_table_name(cleaned_name: str) -> str | None:
+    """Resolve a cleaned table name against db, from exact to partial match"""
     # Exact match first
     if cleaned_name in db:
         return cleaned_name
-    
-    # Case-insensitive match
-    for table_name in db.keys():
-        if table_name.lower() == cleaned_name.lower():
-            return table_name
-    
-    # Partial match (contains)
-    for table_name in db.keys():
-        if cleaned_name.lower() in table_name.lower() or table_name.lower() in cleaned_name.lower():
+
+    # Case-insensitive match is a probe into the upload-time index
+    lowered = cleaned_name.lower()
+    hit = _lower_index.get(lowered)
+    if hit is not None:
+        return hit
+
+    # Partial match (contains) over the precomputed lowered keys
+    for lower_key, table_name in _lower_pairs:
+        if lowered in lower_key or lower_key in lowered:
             return table_name
-    
-    # If no match found, raise error with suggestions
-    available_tables = list(db.keys())
-    raise HTTPException(404, f"Table '{cleaned_name}' not found. Available tables: {available_tables}")
 
-def find_row_name(table_data: list, requested_row_name: str) -> int:
+    return None
+
+def reindex_tables():
+    """Rebuild the case-insensitive name index after db changes"""
+    _lower_index.clear()
+    _lower_pairs.clear()
+    for table_name in db:
+        lowered = table_name.lower()
+        _lower_index.setdefault(lowered, table_name)  # First occurrence wins
+        _lower_pairs.append((lowered, table_name))
+
+def find_row_name(table: dict, requested_row_name: str) -> int:
     """Find row index by name, handling special characters and partial matches"""
     cleaned_row_name = clean_parameter(requested_row_name)
-    
-    # First pass: exact match
-    for i, row in enumerate(table_data):
-        if row and len(row) > 0:
-            first_cell = str(row[0]).strip()
-            if first_cell == cleaned_row_name:
-                return i
-    
+
+    # First pass: exact match against the index built at upload time
+    row_index = table["row_index"]
+    if cleaned_row_name in row_index:
+        return row_index[cleaned_row_name]
+
     # Second pass: case-insensitive match
-    for i, row in enumerate(table_data):
-        if row and len(row) > 0:
-            first_cell = str(row[0]).strip()
-            if first_cell.lower() == cleaned_row_name.lower():
-                return i
-    
+    target = cleaned_row_name.lower()
+    lower_cells = table["row_names_lower"]
+    for i, cell in enumerate(lower_cells):
+        if cell == target:
+            return i
+
     # Third pass: partial match
-    for i, row in enumerate(table_data):
-        if row and len(row) > 0:
-            first_cell = str(row[0]).strip()
-            if cleaned_row_name.lower() in first_cell.lower() or first_cell.lower() in cleaned_row_name.lower():
-                return i
-    
+    for i, cell in enumerate(lower_cells):
+        if target in cell or cell in target:
+            return i
+
     # If no match found, raise error with available row names
-    available_rows = []
-    for row in table_data:
-        if row and len(row) > 0 and str(row[0]).strip():
-            available_rows.append(str(row[0]).strip())
-    
+    available_rows = [name for name in table["row_names"].tolist() if name]
     raise HTTPException(404, f"Row '{cleaned_row_name}' not found. Available rows: {available_rows[:10]}")  # Limit to first 10
 
 def ensure_uploaded():
@@ -92,14 +120,32 @@ async def upload_excel(file: UploadFile = File(...)):
     if not (fname.endswith(".xls") or fname.endswith(".xlsx")):
         raise HTTPException(400, "Only .xls/.xlsx files allowed")
     
-    data = await file.read()
-    try:
-        tables = process_excel_file(data)
-    except Exception as e:
-        raise HTTPException(500, f"Error processing Excel: {e}")
-    
+    # Hash in chunks and hand the spooled temp file straight to the
+    # parser, so the workbook never fully materializes as Python bytes
+    hasher = hashlib.blake2b()
+    await file.seek(0)
+    while chunk := await file.read(1 << 20):
+        hasher.update(chunk)
+
+    # Hashing is orders of magnitude cheaper than a parse, so re-uploads
+    # of a file we have already processed skip process_excel_file entirely
+    digest = hasher.hexdigest()
+    tables = _file_cache.get(digest)
+    if tables is not None:
+        _file_cache.move_to_end(digest)
+    else:
+        try:
+            tables = process_excel_file(file.file)
+        except Exception as e:
+            raise HTTPException(500, f"Error processing Excel: {e}")
+        _file_cache[digest] = tables
+        if len(_file_cache) > _FILE_CACHE_SIZE:
+            _file_cache.popitem(last=False)
+
     db.clear()
     db.update(tables)
+    _name_cache.clear()
+    reindex_tables()
     return TableListResponse(tables=list(db.keys()))
 
 @app.get("/list_tables", response_model=TableListResponse)
@@ -115,8 +161,8 @@ def debug_table(table_name: str = Query(..., min_length=1)):
     
     # Use robust table name finding
     actual_table_name = find_table_name(table_name)
-    table_data = db[actual_table_name]
-    
+    table_data = db[actual_table_name]["raw"]
+
     return {
         "requested_name": table_name,
         "actual_table_name": actual_table_name,
@@ -133,21 +179,17 @@ def get_table_details(table_name: str = Query(..., min_length=1)):
     
     # Use robust table name finding
     actual_table_name = find_table_name(table_name)
-    table_data = db[actual_table_name]
-    
-    if not table_data:
+    table = db[actual_table_name]
+
+    if not len(table["row_names"]):
         raise HTTPException(400, f"Table '{actual_table_name}' has no data")
-    
-    # More robust row name extraction
-    row_names = []
-    for i, row in enumerate(table_data):
-        if not row:  # Empty row
-            row_names.append(f"<empty_row_{i}>")
-        elif not row[0] or row[0].strip() == "":  # Empty first cell
-            row_names.append(f"<empty_cell_{i}>")
-        else:
-            row_names.append(str(row[0]).strip())
-    
+
+    # Row names were stripped at upload; only placeholder empties remain
+    row_names = [
+        name if name else f"<empty_cell_{i}>"
+        for i, name in enumerate(table["row_names"])
+    ]
+
     return TableDetailsResponse(table_name=actual_table_name, row_names=row_names)
 
 @app.get("/row_sum", response_model=RowSumResponse)
@@ -160,17 +202,13 @@ def row_sum(
     
     # Use robust table and row name finding
     actual_table_name = find_table_name(table_name)
-    table_data = db[actual_table_name]
-    
-    row_idx = find_row_name(table_data, row_name)
-    actual_row_name = str(table_data[row_idx][0]).strip()
-    
-    total = 0.0
-    for cell in table_data[row_idx][1:]:  # Skip first column (row name)
-        try:
-            total += float(cell)
-        except:
-            pass  # Skip non-numeric values
+    table = db[actual_table_name]
+
+    row_idx = find_row_name(table, row_name)
+    actual_row_name = table["row_names"][row_idx]
+
+    # Values were coerced to float64 at upload; NaNs are the non-numeric cells
+    total = float(np.nansum(table["values"][row_idx]))
     
     return RowSumResponse(
         table_name=actual_table_name, 
@@ -181,7 +219,7 @@ def row_sum(
 @app.exception_handler(HTTPException)
 def http_error_handler(request, exc: HTTPException):
     """Global HTTP exception handler"""
-    return JSONResponse(
-        status_code=exc.status_code, 
+    return ORJSONResponse(
+        status_code=exc.status_code,
         content={"error": exc.detail}
     )
\ No newline at end of file
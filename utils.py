@@ -1,6 +1,22 @@
+import numpy as np
 import pandas as pd
 from io import BytesIO
-from typing import Dict, List, Tuple
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # The list of exact table titles to anchor on
 TABLE_TITLES = [
@@ -15,113 +31,142 @@ TABLE_TITLES = [
     "Investment Measures",
 ]
 
+# Built once at import so every scan reuses the same lookup structures
+_TITLE_SET = frozenset(TABLE_TITLES)
+_TITLE_ARRAY = np.array(TABLE_TITLES)
+
+def _build_title_automaton():
+    """Compile TABLE_TITLES into an Aho-Corasick automaton, if available"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for title in TABLE_TITLES:
+        automaton.add_word(title, title)
+    automaton.make_automaton()
+    return automaton
+
+_TITLE_AUTOMATON = _build_title_automaton()
+
+def _scan_titles_automaton(stripped: np.ndarray) -> List[Tuple[int, int, str]]:
+    """Match all titles in one automaton pass over the concatenated cells"""
+    flat = stripped.ravel()
+    if not flat.size:
+        return []
+
+    # Join cells with a separator and keep start offsets to map matches back
+    lengths = np.char.str_len(flat)
+    starts = np.zeros(flat.size, dtype=np.int64)
+    np.cumsum(lengths[:-1] + 1, out=starts[1:])
+    joined = "|".join(flat)
+
+    cols = stripped.shape[1]
+    positions = []
+    for end, title in _TITLE_AUTOMATON.iter(joined):
+        begin = end - len(title) + 1
+        cell = int(np.searchsorted(starts, begin, side="right")) - 1
+        # Only whole-cell matches count, exactly like the equality scan
+        if starts[cell] == begin and lengths[cell] == len(title):
+            positions.append((cell // cols, cell % cols, title))
+    return sorted(positions)
+
 def locate_table_titles(df: pd.DataFrame) -> List[Tuple[int, int, str]]:
     """Find all positions of table titles in the spreadsheet"""
-    rows, cols = df.shape
-    data = df.values
-    title_positions = []
-    
-    for r in range(rows):
-        for c in range(cols):
-            cell = str(data[r, c]).strip()
-            if cell in TABLE_TITLES:
-                title_positions.append((r, c, cell))
-    
-    title_positions.sort()
-    return title_positions
-
-def calculate_row_boundaries(title_positions: List[Tuple[int, int, str]], total_rows: int) -> Dict[int, int]:
-    """Calculate vertical boundaries for each table"""
-    title_rows = []
-    for r, c, title in title_positions:
-        if r not in title_rows:
-            title_rows.append(r)
-    title_rows.sort()
-    
-    row_boundaries = {}
-    for i in range(len(title_rows)):
-        this_row = title_rows[i]
-        if i + 1 < len(title_rows):
-            next_row = title_rows[i + 1]
-        else:
-            next_row = total_rows
-        row_boundaries[this_row] = next_row
-    
-    return row_boundaries
-
-def group_titles_by_row(title_positions: List[Tuple[int, int, str]]) -> Dict[int, List[int]]:
-    """Group title columns by their row positions"""
-    row_to_cols = {}
-    for r, c, title in title_positions:
-        if r not in row_to_cols:
-            row_to_cols[r] = []
-        row_to_cols[r].append(c)
-    return row_to_cols
-
-def determine_horizontal_boundaries(start_row: int, start_col: int, row_to_cols: Dict[int, List[int]], total_cols: int) -> Tuple[int, int]:
-    """Determine left/right boundaries for a table"""
-    cols_on_this_row = row_to_cols[start_row].copy()
-    cols_on_this_row.sort()
-    
-    # Default full width
-    left = 0
-    right = total_cols
-
-    if len(cols_on_this_row) > 1:
-        # Build list of segments between each title column
-        segments = []
-        for i in range(len(cols_on_this_row)):
-            seg_start = cols_on_this_row[i]
-            if i + 1 < len(cols_on_this_row):
-                seg_end = cols_on_this_row[i + 1]
-            else:
-                seg_end = total_cols
-            segments.append((seg_start, seg_end))
-        
-        # Find which segment contains our start_col
-        for seg_left, seg_right in segments:
-            if seg_left <= start_col < seg_right:
-                left = seg_left
-                right = seg_right
-                break
-    
-    return left, right
+    # Strip and match every cell at C level instead of a Python double loop;
+    # astype(str) sizes the unicode dtype to the longest cell, no truncation
+    stripped = np.char.strip(df.to_numpy(dtype=object).astype(str))
 
-def extract_table_block(df: pd.DataFrame, top: int, bottom: int, left: int, right: int) -> pd.DataFrame:
-    """Extract and clean a table block from the spreadsheet"""
-    block = df.iloc[top:bottom, left:right].copy()
-    block = block.replace("", pd.NA)
-    
-    # Drop empty rows
-    block = block.dropna(how="all", axis=0)
-    # Drop empty cols
-    block = block.dropna(how="all", axis=1)
-    
-    block = block.reset_index(drop=True)
-    return block
+    if _TITLE_AUTOMATON is not None:
+        return _scan_titles_automaton(stripped)
+
+    # Fallback: vectorized exact match against the title array
+    mask = np.isin(stripped, _TITLE_ARRAY)
+    rs, cs = np.nonzero(mask)
+    titles = stripped[rs, cs]
+
+    return sorted(zip(rs.tolist(), cs.tolist(), titles.tolist()))
+
+def _region_bounds(title_rows, title_cols, unique_rows, next_rows, col_ptr, total_cols):
+    """Compute (top, bottom, left, right) for every title anchor
+
+    title_rows/title_cols are the sorted anchor positions, unique_rows and
+    next_rows give each title row's vertical extent, and col_ptr is a CSR
+    index of title_cols grouped by row.
+    """
+    n = title_rows.size
+    tops = np.empty(n, dtype=np.int64)
+    bottoms = np.empty(n, dtype=np.int64)
+    lefts = np.zeros(n, dtype=np.int64)
+    rights = np.full(n, total_cols, dtype=np.int64)
+
+    for i in range(n):
+        row = title_rows[i]
+        j = np.searchsorted(unique_rows, row)
+        tops[i] = row
+        bottoms[i] = next_rows[j]
+
+        # With several titles on one row, each table spans to the next title;
+        # bisect the row's sorted columns instead of scanning segments
+        lo, hi = col_ptr[j], col_ptr[j + 1]
+        if hi - lo > 1:
+            k = lo + np.searchsorted(title_cols[lo:hi], title_cols[i], side="right") - 1
+            lefts[i] = title_cols[k]
+            if k + 1 < hi:
+                rights[i] = title_cols[k + 1]
+
+    return tops, bottoms, lefts, rights
+
+if numba is not None:
+    # First call pays the compile once; cache=True persists it across runs
+    _region_bounds = numba.njit(cache=True)(_region_bounds)
+
+def extract_table_block(sheet: np.ndarray, top: int, bottom: int, left: int, right: int) -> pd.DataFrame:
+    """Extract and clean a table block from the sheet's cell array"""
+    arr = sheet[top:bottom, left:right]  # View, no copy yet
+    blank = pd.isna(arr) | (arr == "")
+
+    # Drop empty rows and cols in one fancy-indexed select (the only copy)
+    row_keep = ~blank.all(axis=1)
+    col_keep = ~blank.all(axis=0)
+    keep = np.ix_(row_keep, col_keep)
+    block = arr[keep]
+
+    # Blank cells become NaN so clean_up_table's isna ratios see them
+    block[blank[keep]] = np.nan
+    return pd.DataFrame(block)
 
 def find_tables_in_spreadsheet(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
     """Find and extract all tables from the spreadsheet"""
     rows, cols = df.shape
     title_positions = locate_table_titles(df)
-    row_to_cols = group_titles_by_row(title_positions)
-    row_boundaries = calculate_row_boundaries(title_positions, rows)
-    
-    # Track used cells to avoid overlap
-    already_used = []
-    for r in range(rows):
-        row = []
-        for c in range(cols):
-            row.append(False)
-        already_used.append(row)
-    
+
     extracted_tables = {}
+    if not title_positions:
+        return extracted_tables
+
+    # Anchor geometry as arrays: positions are sorted, so columns are
+    # already grouped by row and col_ptr just marks each row's span
+    title_rows = np.array([r for r, c, t in title_positions], dtype=np.int64)
+    title_cols = np.array([c for r, c, t in title_positions], dtype=np.int64)
+    unique_rows = np.unique(title_rows)
+    next_rows = np.append(unique_rows[1:], rows)  # Each table runs to the next title row
+    col_ptr = np.append(np.searchsorted(title_rows, unique_rows), title_rows.size)
+
+    tops, bottoms, lefts, rights = _region_bounds(
+        title_rows, title_cols, unique_rows, next_rows, col_ptr, cols
+    )
+
+    # Track used cells to avoid overlap
+    already_used = np.zeros((rows, cols), dtype=bool)
+
+    # One object view of the sheet that every block extraction slices into
+    sheet = df.to_numpy(dtype=object)
+
     title_counts = {}  # Track counts for duplicate titles
-    
-    for start_row, start_col, base_title in title_positions:
-        if already_used[start_row][start_col]:
+
+    for i, (start_row, start_col, base_title) in enumerate(title_positions):
+        if already_used[start_row, start_col]:
             continue
-            
+
         # Handle duplicate titles
         if base_title in title_counts:
             title_counts[base_title] += 1
@@ -129,87 +174,31 @@ def find_tables_in_spreadsheet(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         else:
             title_counts[base_title] = 0
             title = base_title
-        
-        top = start_row
-        bottom = row_boundaries[start_row]
-        left, right = determine_horizontal_boundaries(start_row, start_col, row_to_cols, cols)
-        
-        block = extract_table_block(df, top, bottom, left, right)
+
+        top, bottom = int(tops[i]), int(bottoms[i])
+        left, right = int(lefts[i]), int(rights[i])
+
+        block = extract_table_block(sheet, top, bottom, left, right)
         
         # Only keep tables with meaningful data
         if block.shape[0] >= 2 and block.shape[1] >= 2:
             extracted_tables[title] = block
             
-            # Mark the area as used
-            for rr in range(top, bottom):
-                for cc in range(left, right):
-                    if rr < len(already_used) and cc < len(already_used[0]):
-                        already_used[rr][cc] = True
+            # Mark the area as used in one vectorized store
+            already_used[top:bottom, left:right] = True
     
     return extracted_tables
 
-def filter_rows_columns(df: pd.DataFrame, max_empty_row_ratio: float, max_empty_col_ratio: float) -> pd.DataFrame:
-    """Filter out mostly empty rows and columns"""
-    # Row filtering
-    na_counts_per_row = df.isna().mean(axis=1)
-    keep_rows = []
-    for idx in range(len(na_counts_per_row)):
-        if na_counts_per_row.iloc[idx] <= max_empty_row_ratio:
-            keep_rows.append(idx)
-    
-    df = df.iloc[keep_rows, :]
-    
-    # Column filtering
-    na_counts_per_col = df.isna().mean(axis=0)
-    keep_cols = []
-    for col in df.columns:
-        if na_counts_per_col[col] <= max_empty_col_ratio:
-            keep_cols.append(col)
-    
-    df = df[keep_cols]
-    return df
-
-def trim_blank_edges(data: pd.DataFrame, by_rows: bool, max_blank_streak: int) -> pd.DataFrame:
-    """Trim blank runs at edges of the table"""
-    if by_rows:
-        pattern = data.isna().all(axis=1).tolist()
-        labels = list(data.index)
-    else:
-        pattern = data.isna().all(axis=0).tolist()
-        labels = list(data.columns)
-    
-    # Find trim points
-    start = 0
-    end = len(pattern) - 1
-    
-    # Trim leading blanks
-    run = 0
-    for i in range(len(pattern)):
-        is_blank = pattern[i]
-        if is_blank:
-            run += 1
-        else:
-            break
-        if run > max_blank_streak:
-            start = i + 1
-    
-    # Trim trailing blanks
-    run = 0
-    reversed_pattern = list(reversed(pattern))
-    for i in range(len(reversed_pattern)):
-        is_blank = reversed_pattern[i]
-        if is_blank:
-            run += 1
-        else:
-            break
-        if run > max_blank_streak:
-            end = len(pattern) - 1 - (i + 1)
-    
-    selected = labels[start : end + 1]
-    if by_rows:
-        return data.loc[selected, :]
-    else:
-        return data.loc[:, selected]
+def _trim_bounds(blank: np.ndarray, max_blank_streak: int) -> Tuple[int, int]:
+    """Kept [start, stop) span; an edge run is dropped once it exceeds the streak"""
+    n = blank.size
+    not_blank = np.flatnonzero(~blank)
+    lead = int(not_blank[0]) if not_blank.size else n
+    trail = n - 1 - int(not_blank[-1]) if not_blank.size else n
+
+    start = lead if lead > max_blank_streak else 0
+    stop = n - trail if trail > max_blank_streak else n
+    return start, stop
 
 def clean_up_table(
     table: pd.DataFrame,
@@ -217,36 +206,128 @@ def clean_up_table(
     max_empty_col_ratio: float = 0.6,
     max_blank_streak: int = 1
 ) -> pd.DataFrame:
-    """Clean up table by removing empty rows/columns and trimming edges"""
-    df = table.copy()
-    df = filter_rows_columns(df, max_empty_row_ratio, max_empty_col_ratio)
-    df = trim_blank_edges(df, by_rows=True, max_blank_streak=max_blank_streak)
-    df = trim_blank_edges(df, by_rows=False, max_blank_streak=max_blank_streak)
-    df = df.reset_index(drop=True)
-    return df
+    """Clean up table by removing empty rows/columns and trimming edges
+
+    All of the filtering - the empty-ratio masks and both edge trims -
+    is decided on one isna matrix, so the cleaned table is materialized
+    with a single DataFrame allocation at the end.
+    """
+    vals = table.to_numpy()
+    na = pd.isna(vals)
+
+    # Ratio filters: rows first, column ratios measured on surviving rows
+    row_mask = na.mean(axis=1) <= max_empty_row_ratio
+    kept = na[row_mask]
+    if kept.size:
+        col_mask = kept.mean(axis=0) <= max_empty_col_ratio
+    else:
+        col_mask = np.zeros(na.shape[1], dtype=bool)
+
+    rows_idx = np.flatnonzero(row_mask)
+    cols_idx = np.flatnonzero(col_mask)
+    sub = na[np.ix_(rows_idx, cols_idx)]
+
+    # Edge trims on the filtered mask: rows first, then columns
+    r_start, r_stop = _trim_bounds(sub.all(axis=1), max_blank_streak)
+    rows_idx = rows_idx[r_start:r_stop]
+    c_start, c_stop = _trim_bounds(sub[r_start:r_stop].all(axis=0), max_blank_streak)
+    cols_idx = cols_idx[c_start:c_stop]
+
+    return pd.DataFrame(vals[np.ix_(rows_idx, cols_idx)])
 
 def convert_table_to_list(table: pd.DataFrame) -> List[List[str]]:
     """Convert DataFrame to list of lists of strings"""
-    result = []
-    for row in table.values.tolist():
-        string_row = []
-        for cell in row:
-            string_row.append(str(cell))
-        result.append(string_row)
-    return result
-
-def process_excel_file(excel_bytes: bytes) -> Dict[str, List[List[str]]]:
-    """Process Excel file and return cleaned tables as lists"""
-    # Read into DataFrame
-    bio = BytesIO(excel_bytes)
-    df = pd.read_excel(bio, header=None, dtype=str, engine="xlrd").fillna("")
-    
+    # NaN has to stringify as "nan", exactly like the old per-cell str()
+    return table.fillna("nan").astype(str).values.tolist()
+
+def normalize_cell(cell) -> str:
+    """Convert a raw cell value to the all-string convention used downstream"""
+    if isinstance(cell, str):
+        return cell
+    if cell is None:
+        return ""
+    # Match the old dtype=str read: integral floats render without ".0"
+    if isinstance(cell, float) and cell.is_integer():
+        return str(int(cell))
+    return str(cell)
+
+def _row_has_anchor(row) -> bool:
+    """Cheap check for a table title among a raw row's cells"""
+    return any(isinstance(cell, str) and cell.strip() in _TITLE_SET for cell in row)
+
+def read_spreadsheet(bio: BinaryIO) -> pd.DataFrame:
+    """Read the first worksheet into an all-string DataFrame
+
+    Rows above the first table title can never belong to a table, so the
+    raw rows are prescanned for anchors and everything before the first
+    one is dropped before the DataFrame is built. A sheet without any
+    anchor yields an empty frame without building one at all.
+    """
+    if CalamineWorkbook is not None:
+        sheet = CalamineWorkbook.from_filelike(bio).get_sheet_by_index(0)
+        rows = sheet.to_python()
+        first_anchor = next((r for r, row in enumerate(rows) if _row_has_anchor(row)), None)
+        if first_anchor is None:
+            return pd.DataFrame()
+        rows = rows[first_anchor:]
+
+        # Normalize straight into a preallocated object array: one pass,
+        # no nested intermediate lists and no pandas type inference, and
+        # the "" prefill covers ragged-row padding. The DataFrame wraps
+        # the array without copying.
+        arr = np.full((len(rows), max(map(len, rows))), "", dtype=object)
+        for r, row in enumerate(rows):
+            arr[r, : len(row)] = [normalize_cell(cell) for cell in row]
+        return pd.DataFrame(arr)
+
+    # Fallback: stream with openpyxl into a preallocated object array
+    from openpyxl import load_workbook
+    wb = load_workbook(bio, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    arr = np.full((ws.max_row or 0, ws.max_column or 0), "", dtype=object)
+    first_anchor = None
+    for r, row in enumerate(ws.iter_rows(values_only=True)):
+        if first_anchor is None and _row_has_anchor(row):
+            first_anchor = r
+        for c, cell in enumerate(row):
+            if cell is not None:
+                arr[r, c] = normalize_cell(cell)
+    wb.close()
+    if first_anchor is None:
+        return pd.DataFrame()
+    return pd.DataFrame(arr[first_anchor:])
+
+def build_table_entry(cleaned: pd.DataFrame) -> Dict:
+    """Package a cleaned table as string rows plus precomputed numeric columns"""
+    raw = convert_table_to_list(cleaned)
+    row_names = np.array([row[0].strip() for row in raw], dtype=object)
+    row_index = {}
+    for i, name in enumerate(row_names):
+        row_index.setdefault(name, i)  # First occurrence wins, like the old scan
+    values = cleaned.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    return {
+        "raw": raw,
+        "row_names": row_names,
+        "row_names_lower": [name.lower() for name in row_names],
+        "row_index": row_index,
+        "values": values,
+    }
+
+def process_excel_file(excel_source: Union[bytes, BinaryIO]) -> Dict[str, Dict]:
+    """Process an Excel file (raw bytes or file-like) into table entries"""
+    # Read into DataFrame; file-likes are consumed in place, never copied
+    if isinstance(excel_source, (bytes, bytearray)):
+        excel_source = BytesIO(excel_source)
+    else:
+        excel_source.seek(0)
+    df = read_spreadsheet(excel_source)
+
     # Extract and clean tables
     raw_tables = find_tables_in_spreadsheet(df)
     final_tables = {}
-    
+
     for title, block in raw_tables.items():
         cleaned = clean_up_table(block)
-        final_tables[title] = convert_table_to_list(cleaned)
-    
+        final_tables[title] = build_table_entry(cleaned)
+
     return final_tables
\ No newline at end of file